@@ -0,0 +1,23 @@
+"""
+Absolute-deadline scheduling helper for the ktune control loops.
+"""
+
+import asyncio
+import time
+
+
+async def sleep_until(deadline: float, spin: float = 0.0) -> None:
+    """
+    Sleep until the absolute time.monotonic() time `deadline` (seconds).
+
+    With the default spin=0 this is asyncio.sleep to an absolute deadline, so ticks
+    don't drift, but wake-ups can be up to ~1 ms late (selector timeouts are rounded
+    up to whole milliseconds on Linux). If `spin` > 0, the last `spin` seconds are spent
+    yielding with asyncio.sleep(0) instead; a spin of ~2 ms gives wake-ups within a few
+    microseconds, at the cost of keeping a core busy for that stretch of every tick.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining > spin:
+        await asyncio.sleep(remaining - spin)
+    while spin > 0 and time.monotonic() < deadline:
+        await asyncio.sleep(0)
@@ -11,12 +11,15 @@ import math
 import time
 import json
 import os
+import shutil
+import tempfile
 import numpy as np
 from datetime import datetime
-import matplotlib.pyplot as plt
 import logging
 from pykos import KOS
+from kos_protos import actuator_pb2
 from . import __version__
+from . import _clock
 
 os.environ["PYTHON_IMK_OVERRIDE"] = "1"
 # Suppress gRPC fork warnings
@@ -30,25 +33,119 @@ logging.getLogger().setLevel(logging.ERROR)
 ############################
 # ACTUATOR STATE LOGGING   #
 ############################
-def log_actuator_state(response,data_dict):
-    if response.states:
-        state = response.states[0]
-        if state.position is not None:
-            data_dict["position"].append(state.position)
-        if state.velocity is not None:
-            data_dict["velocity"].append(state.velocity)
-        if state.torque is not None:
-            data_dict["torque"].append(state.torque)
-        if state.voltage is not None:
-            data_dict["voltage"].append(state.voltage)
-        if state.current is not None:
-            data_dict["current"].append(state.current)
+class Trace:
+    """
+    Preallocated struct-of-arrays log for one test run.
+
+    Measured samples and commands are written by index through their own cursors
+    (i for samples, j for commands), so the two streams may be sized independently.
+    Time stamps are float64; measured and commanded values are float32, which keeps
+    >6 significant digits over the ±360° / ±5000°/s ranges at half the memory.
+
+    With path_prefix set, every channel is a numpy.memmap file "<path_prefix>_<name>.bin",
+    so another process can read the run with Trace.load instead of receiving a copy.
+    """
+
+    # name: (dtype, indexed by the command cursor)
+    CHANNELS = {
+        "time": (np.float64, False),
+        "position": (np.float32, False),
+        "velocity": (np.float32, False),
+        "torque": (np.float32, False),
+        "voltage": (np.float32, False),
+        "current": (np.float32, False),
+        "cmd_time": (np.float64, True),
+        "cmd_pos": (np.float32, True),
+        "cmd_vel": (np.float32, True),
+    }
+
+    def __init__(self, n: int, n_cmd: int = None, path_prefix: str = None):
+        n_cmd = n if n_cmd is None else n_cmd
+        self.path_prefix = path_prefix
+        self.time = self._alloc("time", n)
+        # NaN-filled so missing states and unset fields need no extra write.
+        self.position = self._alloc("position", n, fill=np.nan)
+        self.velocity = self._alloc("velocity", n, fill=np.nan)
+        self.torque = self._alloc("torque", n, fill=np.nan)
+        self.voltage = self._alloc("voltage", n, fill=np.nan)
+        self.current = self._alloc("current", n, fill=np.nan)
+        self.cmd_time = self._alloc("cmd_time", n_cmd)
+        self.cmd_pos = self._alloc("cmd_pos", n_cmd)
+        self.cmd_vel = self._alloc("cmd_vel", n_cmd)
+        self.i = 0
+        self.j = 0
+
+    def _alloc(self, name, n, fill=None):
+        dtype = self.CHANNELS[name][0]
+        if self.path_prefix is None:
+            return np.empty(n, dtype=dtype) if fill is None else np.full(n, fill, dtype=dtype)
+        # An empty file cannot be mapped, so always reserve at least one slot.
+        arr = np.memmap(f"{self.path_prefix}_{name}.bin", dtype=dtype, mode="w+", shape=(max(n, 1),))
+        if fill is not None:
+            arr[:] = fill
+        return arr
+
+    def push(self, t, response):
+        """Log one get_actuators_state response received at time t (missing values stay NaN)."""
+        i = self.i
+        self.time[i] = t
+        if response.states:
+            # The state fields are proto3 optional: unset ones read as 0.0, so check presence.
+            state = response.states[0]
+            if state.HasField("position"):
+                self.position[i] = state.position
+            if state.HasField("velocity"):
+                self.velocity[i] = state.velocity
+            if state.HasField("torque"):
+                self.torque[i] = state.torque
+            if state.HasField("voltage"):
+                self.voltage[i] = state.voltage
+            if state.HasField("current"):
+                self.current[i] = state.current
+        self.i = i + 1
+
+    def push_command(self, t, pos, vel):
+        """Log one command sent at time t."""
+        j = self.j
+        self.cmd_time[j] = t
+        self.cmd_pos[j] = pos
+        self.cmd_vel[j] = vel
+        self.j = j + 1
+
+    def as_dict(self):
+        """Views (no copies) of the filled part of every channel, keyed like the raw data files."""
+        return {name: getattr(self, name)[:self.j if is_cmd else self.i]
+                for name, (_, is_cmd) in self.CHANNELS.items()}
+
+    def flush(self):
+        """Write memory-mapped channels back to their files (no-op for in-memory traces)."""
+        if self.path_prefix is not None:
+            for name in self.CHANNELS:
+                getattr(self, name).flush()
+
+    @classmethod
+    def load(cls, path_prefix, n, n_cmd):
+        """Map a flushed trace's files read-only; returns the same layout as as_dict()."""
+        return {name: np.memmap(f"{path_prefix}_{name}.bin", dtype=dtype, mode="r")[:n_cmd if is_cmd else n]
+                for name, (dtype, is_cmd) in cls.CHANNELS.items()}
+
+
+def make_command_request(actuator_id: int):
+    """
+    Build a single-actuator CommandActuatorsRequest for reuse across ticks.
+    Returns (request, command); set command.position/velocity in place, then send
+    request via kos.actuator.stub.CommandActuators.
+    """
+    request = actuator_pb2.CommandActuatorsRequest()
+    command = request.commands.add()
+    command.actuator_id = actuator_id
+    return request, command
 
 
 #############################
 # TUNING METRICS  #
 #############################
-def compute_step_overshoots(time_array, pos_array, steps, window_duration=1.0):
+def compute_step_overshoots(time_array, pos_array, steps, window_duration=1.0, command_times=None):
     """
     For each step transition, compute the overshoot percentage based on the maximum (or minimum)
     position reached within a fixed window (default: 1 second) after the new target is commanded.
@@ -60,34 +157,38 @@ def compute_step_overshoots(time_array, pos_array, steps, window_duration=1.0):
 
     :param time_array: Array of time stamps (seconds)
     :param pos_array:  Array of measured positions (degrees)
-    :param steps:      List of tuples (target, duration) that define the step sequence.
+    :param steps:      List of tuples (target, velocity, duration) that define the step sequence.
                        The first element defines the starting position.
     :param window_duration: Duration (in seconds) after the new command to look for the peak.
+    :param command_times: Optional logged send time of each step command (one per entry in steps).
+                          When omitted, command times are reconstructed from the step durations.
     :return: List of overshoot percentages (one per transition).
     """
-    import numpy as np
-
-    time_array = np.array(time_array)
-    pos_array  = np.array(pos_array)
-
-    # Build an array of step command times (cumulative durations)
-    step_times = [0.0]
-    for (target, velocity, duration) in steps:
-        step_times.append(step_times[-1] + duration)
+    time_array = np.ascontiguousarray(time_array, dtype=np.float64)
+    pos_array  = np.asarray(pos_array, dtype=np.float32)
+
+    if command_times is None or len(command_times) < len(steps):
+        # Build an array of step command times (cumulative durations)
+        durations = np.fromiter((s[2] for s in steps), dtype=np.float64, count=len(steps))
+        command_times = np.empty(len(steps) + 1)
+        command_times[0] = 0.0
+        np.cumsum(durations, out=command_times[1:])
+    # The initial hold has no preceding target, so only transitions 1..T-1 get a window.
+    command_times = np.asarray(command_times, dtype=np.float64)[1:len(steps)]
+
+    # time_array is non-decreasing, so each window [command_time, command_time + window_duration]
+    # maps to a contiguous slice whose bounds can be found by binary search.
+    lo = np.searchsorted(time_array, command_times, side='left')
+    hi = np.searchsorted(time_array, command_times + window_duration, side='right')
 
     overshoots = []
     # For each step transition (i.e. from step i-1 to i)
     for i in range(1, len(steps)):
         old_target = steps[i-1][0]
         new_target = steps[i][0]
-        command_time = step_times[i]
-        window_end = command_time + window_duration
-
-        # Find indices of data within [command_time, command_time + window_duration]
-        idx = np.where((time_array >= command_time) & (time_array <= window_end))[0]
-        if len(idx) == 0:
+        if hi[i-1] <= lo[i-1]:
             continue
-        p_window = pos_array[idx]
+        p_window = pos_array[lo[i-1]:hi[i-1]]
 
         if new_target > old_target:
             # For an upward step, overshoot is defined by the maximum value in the window.
@@ -99,7 +200,7 @@ def compute_step_overshoots(time_array, pos_array, steps, window_duration=1.0):
             overshoot = (new_target - trough) / (old_target - new_target) * 100.0
 
         # Clamp negative overshoot to zero.
-        overshoots.append(max(0.0, overshoot))
+        overshoots.append(max(0.0, float(overshoot)))
 
     return overshoots
 
@@ -123,15 +224,17 @@ async def run_chirp_test(kos: KOS,
                          max_torque: float,
                          torque_enabled: bool,
                          update_rate: float,
-                         data_dict: dict,
                          start_time: float,
                          is_real: bool,
-                         start_pos: float = 0.0):
+                         start_pos: float = 0.0,
+                         trace_path: str = None,
+                         timer_spin: float = 0.0) -> Trace:
     """
     Command a chirp waveform and log timestamps, commanded, and measured values.
     The chirp is defined as:
        angle = amplitude * sin(2*pi*(init_freq*t + 0.5*sweep_rate*t^2))
        velocity = amplitude * cos(2*pi*(init_freq*t + 0.5*sweep_rate*t^2)) * 2*pi*(init_freq + sweep_rate*t)
+    timer_spin (seconds) is passed to _clock.sleep_until for each command tick.
     """
     # Choose gains based on whether we're on a real system or simulation.
     if is_real:
@@ -154,36 +257,37 @@ async def run_chirp_test(kos: KOS,
         {'actuator_id': actuator_id, 'position': start_pos, 'velocity': 5}
     ])
     await asyncio.sleep(2)
-    start_time = time.time()
+    start_time = time.monotonic()
 
     dt = 1.0 / update_rate
     steps = int(duration / dt)
-    next_tick = time.time()
+
+    # Precompute phase, angle and velocity tables for the whole sweep.
+    t = np.arange(steps) * dt
+    phase = 2.0 * math.pi * (init_freq * t + 0.5 * sweep_rate * t * t)
+    cmd_pos = start_pos + amplitude * np.sin(phase)
+    cmd_vel = amplitude * np.cos(phase) * 2.0 * math.pi * (init_freq + sweep_rate * t)
+
+    trace = Trace(steps, path_prefix=trace_path)
+    request, command = make_command_request(actuator_id)
+    next_tick = time.monotonic()
     for i in range(steps):
-        t = i * dt
-        # Compute phase, angle and velocity.
-        phase = 2 * math.pi * (init_freq * t + 0.5 * sweep_rate * t * t)
-        angle = start_pos + amplitude * math.sin(phase)
-        vel = amplitude * math.cos(phase) * 2 * math.pi * (init_freq + sweep_rate * t)
+        angle = cmd_pos[i]
+        vel = cmd_vel[i]
 
-        t_send = time.time() - start_time
-        data_dict["cmd_time"].append(t_send)
-        data_dict["cmd_pos"].append(angle)
-        data_dict["cmd_vel"].append(vel)
+        trace.push_command(time.monotonic() - start_time, angle, vel)
 
-        await kos.actuator.command_actuators([
-            {'actuator_id': actuator_id, 'position': angle, 'velocity': vel}
-        ])
+        command.position = angle
+        command.velocity = vel
+        await kos.actuator.stub.CommandActuators(request)
 
         response = await kos.actuator.get_actuators_state([actuator_id])
-        t_resp = time.time() - start_time
-        log_actuator_state(response=response,data_dict=data_dict)
-        data_dict["time"].append(t_resp)
+        trace.push(time.monotonic() - start_time, response)
 
         next_tick += dt
-        sleep_time = next_tick - time.time()
-        if sleep_time > 0:
-            await asyncio.sleep(sleep_time)
+        await _clock.sleep_until(next_tick, spin=timer_spin)
+
+    return trace
 
 
 #############################
@@ -204,14 +308,19 @@ async def run_sine_test(kos: KOS,
                         max_torque: float,
                         torque_enabled: bool,
                         update_rate: float,
-                        data_dict: dict,
                         start_time: float,
                         is_real: bool,
-                        start_pos: float = 0.0):
+                        start_pos: float = 0.0,
+                        sample_rate: float = 50.0,
+                        log_duration_pad: float = 0.0,
+                        trace_path: str = None,
+                        timer_spin: float = 0.0) -> Trace:
     """
     Command a sine wave and log timestamps, commanded, and measured values.
     Uses simulation gains (sim_kp, sim_kv) if is_real is False.
-    When request_state is False, measured values are set equal to commanded values.
+    Commands are sent at update_rate while state is sampled independently at sample_rate,
+    for duration + log_duration_pad seconds. timer_spin (seconds) is passed to
+    _clock.sleep_until for each command tick; sampling always sleeps without spinning.
     """
     # Choose which gains to use
     if is_real:
@@ -246,36 +355,49 @@ async def run_sine_test(kos: KOS,
         {'actuator_id': actuator_id, 'position': start_pos, 'velocity': 2}
     ])
     await asyncio.sleep(2)
-    start_time = time.time()
+    start_time = time.monotonic()
 
     dt = 1.0 / update_rate
     steps = int(duration / dt)
-    next_tick = time.time()
-    for i in range(steps):
-        t = i * dt
-        angle = start_pos + amplitude * math.sin(2.0 * math.pi * freq * t)
-        vel = amplitude * (2.0 * math.pi * freq) * math.cos(2.0 * math.pi * freq * t)
-
-        # Log command time
-        t_send = time.time() - start_time
-        data_dict["cmd_time"].append(t_send)
-        data_dict["cmd_pos"].append(angle)
-        data_dict["cmd_vel"].append(vel)
-        
-        # Send the command
-        await kos.actuator.command_actuators([
-            {'actuator_id': actuator_id, 'position': angle, 'velocity': vel}
-        ])
 
-        response = await kos.actuator.get_actuators_state([actuator_id])
-        t_resp = time.time() - start_time
-        log_actuator_state(response=response,data_dict=data_dict)
-        data_dict["time"].append(t_resp)
-                
-        next_tick += dt
-        sleep_time = next_tick - time.time()
-        if sleep_time > 0:
-            await asyncio.sleep(sleep_time)
+    # Precompute the whole commanded waveform in one vectorized pass.
+    t = np.arange(steps) * dt
+    w = 2.0 * math.pi * freq
+    cmd_pos = start_pos + amplitude * np.sin(w * t)
+    cmd_vel = amplitude * w * np.cos(w * t)
+
+    sample_period = 1.0 / sample_rate
+    n_samples = int((duration + log_duration_pad) * sample_rate)
+    trace = Trace(n_samples, steps, path_prefix=trace_path)
+
+    # Commanding and sampling run as separate coroutines so a slow RPC on one
+    # side does not stall the other's cadence.
+    async def command_loop(t0):
+        # One request message is mutated in place every tick instead of rebuilt from dicts.
+        request, command = make_command_request(actuator_id)
+        for i in range(steps):
+            angle = cmd_pos[i]
+            vel = cmd_vel[i]
+
+            # Log command time
+            trace.push_command(time.monotonic() - start_time, angle, vel)
+
+            # Send the command
+            command.position = angle
+            command.velocity = vel
+            await kos.actuator.stub.CommandActuators(request)
+            await _clock.sleep_until(t0 + (i + 1) * dt, spin=timer_spin)
+
+    async def sample_loop(t0):
+        for k in range(n_samples):
+            response = await kos.actuator.get_actuators_state([actuator_id])
+            trace.push(time.monotonic() - start_time, response)
+            await _clock.sleep_until(t0 + (k + 1) * sample_period)
+
+    t0 = time.monotonic()
+    await asyncio.gather(command_loop(t0), sample_loop(t0))
+
+    return trace
 
 
 
@@ -299,11 +421,11 @@ async def run_step_test(
     max_torque: float,
     torque_enabled: bool = True,
     vel_limit: float = 200.0,
-    data_dict: dict = None,
     start_time: float = None,
     sample_rate: float = 50.0,
     is_real: bool = True,
-    start_pos: float = 0.0):
+    start_pos: float = 0.0,
+    trace_path: str = None) -> Trace:
 
     """
     Perform a step test with continuous sampling during hold periods.
@@ -345,35 +467,25 @@ async def run_step_test(
 
     await asyncio.sleep(abs(start_pos)/(init_velocity)+3)
     sample_period = 1.0 / sample_rate
-    next_sample_time = time.time()
 
-    async def sample_state(current_cmd_pos, current_cmd_vel):
-        nonlocal next_sample_time
-        try:
-            response = await kos.actuator.get_actuators_state([actuator_id])
-            t_resp = time.time() - start_time
-            log_actuator_state(response=response, data_dict=data_dict)
-            data_dict["time"].append(t_resp)
-            data_dict["cmd_time"].append(t_resp)  # Record command at each sample
-            data_dict["cmd_pos"].append(current_cmd_pos)
-            data_dict["cmd_vel"].append(current_cmd_vel)
-            
-            next_sample_time += sample_period
-            sleep_time = next_sample_time - time.time()
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
-        except Exception as e:
-            print(f"Error sampling state: {e}")
-
-
-    start_time = time.time()
-    end_hold = time.time() + step_hold_time
-    while time.time() < end_hold:
-        await sample_state(current_cmd_pos=start_pos, current_cmd_vel=vel_limit)
-    
-    for _ in range(step_count):
-        # STEP UP        
-        target_pos = start_pos + step_size
+    # Every hold is sampled a fixed number of times, so the buffers can be sized up front.
+    n_samples = int(step_hold_time * sample_rate)
+    # Commands only change at step edges, so they are logged as events rather than per sample.
+    trace = Trace(n_samples * (1 + 2 * step_count), 1 + 2 * step_count, path_prefix=trace_path)
+
+    async def _sample_hold(n):
+        """Sample the actuator n times at absolute deadlines on the monotonic clock."""
+        t0 = time.monotonic()
+        for k in range(1, n + 1):
+            try:
+                response = await kos.actuator.get_actuators_state([actuator_id])
+                trace.push(time.monotonic() - start_time, response)
+            except Exception as e:
+                print(f"Error sampling state: {e}")
+            await _clock.sleep_until(t0 + k * sample_period)
+
+    async def _command(target_pos):
+        trace.push_command(time.monotonic() - start_time, target_pos, vel_limit)
         if is_real:
             await kos.actuator.command_actuators([
                 {'actuator_id': actuator_id, 'position': target_pos, 'velocity': vel_limit}
@@ -384,25 +496,22 @@ async def run_step_test(
             ])
         else:
             await kos.actuator.command_actuators([{'actuator_id': actuator_id, 'position': target_pos}])
-        end_hold = time.time() + step_hold_time
-        while time.time() < end_hold:
-            await sample_state(current_cmd_pos=target_pos, current_cmd_vel=vel_limit)
-    
+
+    start_time = time.monotonic()
+    # The actuator was already sent to start_pos above; log it as the first command event.
+    trace.push_command(0.0, start_pos, vel_limit)
+    await _sample_hold(n_samples)
+
+    for _ in range(step_count):
+        # STEP UP
+        await _command(start_pos + step_size)
+        await _sample_hold(n_samples)
+
         # STEP DOWN
-        target_pos = start_pos
-        if is_real:
-            await kos.actuator.command_actuators([
-                {'actuator_id': actuator_id, 'position': target_pos, 'velocity': vel_limit}
-            ])
-            await asyncio.sleep(0.01)
-            await kos.actuator.command_actuators([
-                {'actuator_id': actuator_id, 'position': target_pos, 'velocity': vel_limit}
-            ])
-        else:
-            await kos.actuator.command_actuators([{'actuator_id': actuator_id, 'position': target_pos}])
-        end_hold = time.time() + step_hold_time
-        while time.time() < end_hold:
-            await sample_state(current_cmd_pos=target_pos, current_cmd_vel=vel_limit)
+        await _command(start_pos)
+        await _sample_hold(n_samples)
+
+    return trace
 
 
 #############################
@@ -431,86 +540,36 @@ async def configure_additional_servos(kos: KOS, args):
 
 
 #############################
-# SIMULATOR TEST #
+# KOS CLIENTS #
 #############################
-def run_sim_test(args, global_start, out_queue):
-    sim_data = {"time": [], "position": [], "velocity": [], "torque": [], "voltage": [], "current": [], "temperature": [], "cmd_time": [], "cmd_pos": [], "cmd_vel": []}
-    if args.test == "sine":
-        asyncio.run(run_sine_test(
-            kos=KOS(args.sim_ip),
-            actuator_id=args.actuator_id,
-            amplitude=args.amp,
-            freq=args.freq,
-            duration=args.duration,
-            kp=args.kp,
-            kd=args.kd,
-            ki=args.ki,
-            sim_kp=args.sim_kp,
-            sim_kv=args.sim_kv,
-            acceleration=args.acceleration,
-            max_torque=args.max_torque,
-            torque_enabled=(not args.torque_off),
-            update_rate=50.0,
-            data_dict=sim_data,
-            start_time=global_start,
-            is_real=False,
-            start_pos=args.start_pos,
-        ))
-    elif args.test == "step":
-        asyncio.run(run_step_test(
-            kos=KOS(args.sim_ip),
-            actuator_id=args.actuator_id,
-            step_size=args.step_size,
-            step_hold_time=args.step_hold_time,
-            step_count=args.step_count,
-            kp=args.kp,
-            kd=args.kd,
-            ki=args.ki,
-            sim_kp=args.sim_kp,
-            sim_kv=args.sim_kv,
-            acceleration=args.acceleration,
-            max_torque=args.max_torque,
-            torque_enabled=(not args.torque_off),
-            vel_limit=400.0,
-            data_dict=sim_data,
-            start_time=global_start,
-            sample_rate=args.sample_rate,
-            is_real=False,
-            start_pos=args.start_pos,
-        ))
-    elif args.test == "chirp":
-        asyncio.run(run_chirp_test(
-            kos=KOS(args.sim_ip),
-            actuator_id=args.actuator_id,
-            amplitude=args.chirp_amp,
-            init_freq=args.chirp_init_freq,
-            sweep_rate=args.chirp_sweep_rate,
-            duration=args.chirp_duration,
-            kp=args.kp,
-            kd=args.kd,
-            ki=args.ki,
-            sim_kp=args.sim_kp,
-            sim_kv=args.sim_kv,
-            acceleration=args.acceleration,
-            max_torque=args.max_torque,
-            torque_enabled=(not args.torque_off),
-            update_rate=50.0,
-            data_dict=sim_data,
-            start_time=global_start,
-            is_real=False,
-            start_pos=args.start_pos,
-        ))
-    out_queue.put(sim_data)
+# One client (and gRPC channel) per address, shared by the connection probe,
+# servo configuration and the tests so each channel is set up only once.
+_kos_clients = {}
+
+
+def get_kos(ip: str) -> KOS:
+    """Return the shared KOS client for ip, creating it on first use."""
+    kos = _kos_clients.get(ip)
+    if kos is None:
+        kos = _kos_clients[ip] = KOS(ip)
+    return kos
+
+
+async def close_kos_clients():
+    """Close every shared KOS client; must run on the loop that used them."""
+    for kos in _kos_clients.values():
+        await kos.close()
+    _kos_clients.clear()
 
 
 #############################
-# REAL ROBOT TEST #
+# TEST DISPATCH #
 #############################
-def run_real_test(args, global_start, out_queue):
-    real_data = {"time": [], "position": [], "velocity": [], "torque": [], "voltage": [], "current": [], "temperature": [], "cmd_time": [], "cmd_pos": [], "cmd_vel": []}
+async def run_test(args, kos: KOS, global_start: float, is_real: bool, trace_path: str = None) -> Trace:
+    """Run the selected test against one KOS endpoint and return its Trace (memory-mapped if trace_path is set)."""
     if args.test == "sine":
-        asyncio.run(run_sine_test(
-            kos=KOS(args.ip),
+        trace = await run_sine_test(
+            kos=kos,
             actuator_id=args.actuator_id,
             amplitude=args.amp,
             freq=args.freq,
@@ -524,14 +583,17 @@ def run_real_test(args, global_start, out_queue):
             max_torque=args.max_torque,
             torque_enabled=(not args.torque_off),
             update_rate=50.0,
-            data_dict=real_data,
             start_time=global_start,
-            is_real=True,
+            is_real=is_real,
             start_pos=args.start_pos,
-        ))
+            trace_path=trace_path,
+            sample_rate=args.sample_rate,
+            log_duration_pad=args.log_duration_pad,
+            timer_spin=args.timer_spin_ms / 1000.0,
+        )
     elif args.test == "step":
-        asyncio.run(run_step_test(
-            kos=KOS(args.ip),
+        trace = await run_step_test(
+            kos=kos,
             actuator_id=args.actuator_id,
             step_size=args.step_size,
             step_hold_time=args.step_hold_time,
@@ -545,15 +607,15 @@ def run_real_test(args, global_start, out_queue):
             max_torque=args.max_torque,
             torque_enabled=(not args.torque_off),
             vel_limit=400.0,
-            data_dict=real_data,
             start_time=global_start,
             sample_rate=args.sample_rate,
-            is_real=True,
+            is_real=is_real,
             start_pos=args.start_pos,
-        ))
+            trace_path=trace_path,
+        )
     elif args.test == "chirp":
-        asyncio.run(run_chirp_test(
-            kos=KOS(args.ip),
+        trace = await run_chirp_test(
+            kos=kos,
             actuator_id=args.actuator_id,
             amplitude=args.chirp_amp,
             init_freq=args.chirp_init_freq,
@@ -568,153 +630,140 @@ def run_real_test(args, global_start, out_queue):
             max_torque=args.max_torque,
             torque_enabled=(not args.torque_off),
             update_rate=50.0,
-            data_dict=real_data,
             start_time=global_start,
-            is_real=True,
+            is_real=is_real,
             start_pos=args.start_pos,
-        ))
-    out_queue.put(real_data)
-
+            trace_path=trace_path,
+            timer_spin=args.timer_spin_ms / 1000.0,
+        )
+    return trace
 
 
 #############################
-# MAIN (CLI + Orchestration)#
+# ISOLATED PROCESS WORKERS  #
 #############################
-async def main():
-    parser = argparse.ArgumentParser(
-        description="ktune - CLI tool for actuator tests (sine or step) on both simulator and real robot."
-    )
-    parser.add_argument("--name", default="Zeroth01", help="Name For Plot titles")
-    parser.add_argument("--sim_ip", default="127.0.0.1", help="Simulator KOS IP address (default=localhost)")
-    parser.add_argument("--ip", default="192.168.42.1", help="Real robot KOS IP address (default=192.168.42.1)")
-    parser.add_argument("--actuator-id", type=int, default=11, help="Actuator ID to test.")
-    parser.add_argument("--test", choices=["step", "sine", "chirp"], help="Type of test to run.")
-    parser.add_argument("--start-pos", type=float, default=0.0, help="Start position for tests (degrees)")
-    # Chirp test parameters
-    parser.add_argument("--chirp-amp", type=float, default=5.0, help="Chirp amplitude (degrees)")
-    parser.add_argument("--chirp-init-freq", type=float, default=1.0, help="Chirp initial frequency (Hz)")
-    parser.add_argument("--chirp-sweep-rate", type=float, default=0.5, help="Chirp sweep rate (Hz per second)")
-    parser.add_argument("--chirp-duration", type=float, default=5.0, help="Chirp test duration (seconds)")
+# Only used with --isolate; by default both tests share one event loop in main().
+# Samples are written straight into memory-mapped files, so only their location and
+# fill counts go through the queue; the parent maps the same files with Trace.load.
+def run_sim_test(args, global_start, out_queue, trace_path):
+    trace = asyncio.run(run_test(args, KOS(args.sim_ip), global_start, is_real=False, trace_path=trace_path))
+    trace.flush()
+    out_queue.put({"path_prefix": trace_path, "n": trace.i, "n_cmd": trace.j})
 
-    # Sine test parameters
-    parser.add_argument("--freq", type=float, default=1.0, help="Sine frequency (Hz)")
-    parser.add_argument("--amp", type=float, default=5.0, help="Sine amplitude (degrees)")
-    parser.add_argument("--duration", type=float, default=5.0, help="Sine test duration (seconds)")
 
-    # Step test parameters
-    parser.add_argument("--step-size", type=float, default=10.0, help="Step size (degrees)")
-    parser.add_argument("--step-hold-time", type=float, default=3.0, help="Time to hold at step (seconds)")
-    parser.add_argument("--step-count", type=int, default=2, help="Number of steps to take")
-
-    # Simulation gains
-    parser.add_argument("--sim-kp", type=float, default=24.0, help="Proportional gain")
-    parser.add_argument("--sim-kv", type=float, default=0.75, help="Damping gain")
-
-    # Actuator config
-    parser.add_argument("--kp", type=float, default=20.0, help="Proportional gain")
-    parser.add_argument("--kd", type=float, default=55.0, help="Derivative gain")
-    parser.add_argument("--ki", type=float, default=0.01, help="Integral gain")
-    parser.add_argument("--acceleration", type=float, default=0.0, help="Acceleration (deg/s^2)")
-    parser.add_argument("--max-torque", type=float, default=100.0, help="Max torque")
-    parser.add_argument("--torque-off", action="store_true", help="Disable torque for test?")
-
-    # Data logging
-    parser.add_argument("--no-log", action="store_true", help="Do not record/plot data")
-    parser.add_argument("--log-duration-pad", type=float, default=2.0,
-                        help="Pad (seconds) after motion ends to keep logging")
-    parser.add_argument("--sample-rate", type=float, default=100.0, help="Data collection rate (Hz)")
-
-    # Servo Enable/Disable
-    parser.add_argument("--enable-servos", type=str, help="Comma delimited list of servo IDs to enable (e.g., 11,12,13)")
-    parser.add_argument("--disable-servos", type=str, help="Comma delimited list of servo IDs to disable (e.g., 31,32,33)")
-    parser.add_argument('--version', action='version', version=f'ktune v{__version__}')
-    args = parser.parse_args()
+def run_real_test(args, global_start, out_queue, trace_path):
+    trace = asyncio.run(run_test(args, KOS(args.ip), global_start, is_real=True, trace_path=trace_path))
+    trace.flush()
+    out_queue.put({"path_prefix": trace_path, "n": trace.i, "n_cmd": trace.j})
 
-    # Prepare separate data dictionaries for simulator and real robot.
-    sim_data = {
-        "time": [],
-        "position": [],
-        "velocity": [],
-        "cmd_time": [],
-        "cmd_pos": [],
-        "cmd_vel": []
-    }
-    real_data = {
-        "time": [],
-        "position": [],
-        "velocity": [],
-        "cmd_time": [],
-        "cmd_pos": [],
-        "cmd_vel": []
-    }
-    now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    # Handle servo enable/disable separately from test execution
-    if args.enable_servos is not None or args.disable_servos is not None:
-        real_kos = KOS(args.ip)
-        await configure_additional_servos(real_kos, args)
-        await real_kos.close()
 
-        sim_kos = KOS(args.sim_ip)
-        await configure_additional_servos(sim_kos, args)
-        await sim_kos.close()
-        print("Servos configured")
-        return
-    elif not args.test:
-        parser.print_help()
-        exit(1)
-
-    print(f"Connecting to Simulator at {args.sim_ip} and Real robot at {args.ip}...")
-
-    print("Testing KOS-SIM connection performance...")
-    sim_kos = KOS(args.sim_ip)
-    sim_start = time.time()
-    for _ in range(100):  # Test 100 samples
-        await sim_kos.actuator.get_actuators_state([args.actuator_id])
-    sim_end = time.time()
-    sim_rate = 100 / (sim_end - sim_start)
-    await sim_kos.close()
-
-    print("Testing KOS-REAL connection performance...")
-    real_kos = KOS(args.ip)
-    real_start = time.time() 
-    for _ in range(100):  # Test 100 samples
-        await real_kos.actuator.get_actuators_state([args.actuator_id])
-    real_end = time.time()
-    real_rate = 100 / (real_end - real_start)
-    await real_kos.close()
-
-    await asyncio.sleep(1.0)
-    print(f"Max KOS-SIM sampling rate: {sim_rate:.1f} Hz")
-    print(f"Max KOS-REAL sampling rate: {real_rate:.1f} Hz")
-    print(f"Required sampling rate: {args.sample_rate} Hz")
-
-    if sim_rate < args.sample_rate or real_rate < args.sample_rate:
-        print(f"\nERROR: Requested sampling rate ({args.sample_rate} Hz) exceeds maximum achievable rates")
-        print("Try re-running kos-sim --no-render or reduce the sampling rate and try again")
-        exit(1)
-    
+#############################
+# PLOTTING #
+#############################
+def hold_commands(t, cmd_time, cmd_values):
+    """Zero-order-hold a command event log (cmd_time, cmd_values) onto the sample times t."""
+    idx = np.searchsorted(cmd_time, t, side='right') - 1
+    return np.asarray(cmd_values)[np.clip(idx, 0, None)]
+
+
+def save_npz(path, sim_data, real_data, header, title_str):
+    """Write both runs as compressed float32 channels, plus the JSON header and plot title."""
+    channels = {f"{side}_{k}": np.asarray(v, dtype=np.float32)
+                for side, data in (("sim", sim_data), ("real", real_data))
+                for k, v in data.items()}
+    np.savez_compressed(path, header=json.dumps(header), title=title_str, **channels)
+
+
+def load_npz(path):
+    """Inverse of save_npz: returns (sim_data, real_data, header, title_str)."""
+    with np.load(path) as npz:
+        sim_data = {k[len("sim_"):]: npz[k] for k in npz.files if k.startswith("sim_")}
+        real_data = {k[len("real_"):]: npz[k] for k in npz.files if k.startswith("real_")}
+        header = json.loads(str(npz["header"]))
+        title_str = str(npz["title"])
+    return sim_data, real_data, header, title_str
+
+
+def plot_results(sim_data, real_data, title_str, test, png_path, show=True):
+    """Plot simulator (left column) and real robot (right column) position/velocity traces."""
+    # Imported lazily: loading the pyplot backend dominates start-up for short tests.
+    import matplotlib.pyplot as plt
+
+    def command_pos(data):
+        if test == "step":
+            # Step commands are stored as change events; expand them onto the sample times.
+            return data["time"], hold_commands(data["time"], data["cmd_time"], data["cmd_pos"])
+        return data["cmd_time"], data["cmd_pos"]
+
+    # Plotting both simulator and real data on the same plots.
+    fig, axs = plt.subplots(2, 2, figsize=(14, 8), sharex=True)
+    fig.suptitle(title_str, fontsize=16)
+    axs[0, 0].plot(*command_pos(sim_data), '--', color='black', linewidth=1, label='Sim Command Pos')
+    axs[0, 0].plot(sim_data["time"], sim_data["position"], 'o-', color='blue', markersize=2, label='Sim Actual Pos')
+    axs[0, 0].set_title("Sim - Position")
+    axs[0, 0].set_ylabel("Position (deg)")
+    axs[0, 0].legend()
+    axs[0, 0].grid(True)
+
+    if test == "sine":
+        axs[1, 0].plot(sim_data["cmd_time"], sim_data["cmd_vel"], '--', color='black', linewidth=1, label='Sim Command Vel')
+    axs[1, 0].plot(sim_data["time"], sim_data["velocity"], 'o-', color='blue', markersize=2, label='Sim Actual Vel')
+    axs[1, 0].set_title("Sim - Velocity")
+    axs[1, 0].set_xlabel("Time (s)")
+    axs[1, 0].set_ylabel("Velocity (deg/s)")
+    axs[1, 0].legend()
+    axs[1, 0].grid(True)
+
+    # Real Robot subplots (right column)
+    axs[0, 1].plot(*command_pos(real_data), '--', color='black', linewidth=1, label='Real Command Pos')
+    axs[0, 1].plot(real_data["time"], real_data["position"], 's-', color='red', markersize=2, linewidth=1, label='Real Actual Pos')
+    axs[0, 1].set_title("Real - Position")
+    axs[0, 1].set_ylabel("Position (deg)")
+    axs[0, 1].legend()
+    axs[0, 1].grid(True)
+
+    if test == "sine":
+        axs[1, 1].plot(real_data["cmd_time"], real_data["cmd_vel"], '--', color='black', linewidth=1, label='Real Command Vel')
+    axs[1, 1].plot(real_data["time"], real_data["velocity"], 's-', color='red', markersize=2, linewidth=1,label='Real Actual Vel')
+    axs[1, 1].set_title("Real - Velocity")
+    axs[1, 1].set_xlabel("Time (s)")
+    axs[1, 1].set_ylabel("Velocity (deg/s)")
+    axs[1, 1].legend()
+    axs[1, 1].grid(True)
+
+    plt.figtext(0.5, 0.02, f"ktune v{__version__}", ha='center', va='center', fontsize=12)
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    plt.savefig(png_path)
+    print(f"Saving plot data to {png_path}")
+    if show:
+        plt.show()
+    plt.close()
 
-    global_start = time.time()
-    sim_queue = Queue()
-    real_queue = Queue()
 
-    sim_proc = Process(target=run_sim_test, args=(args, global_start, sim_queue))
-    real_proc = Process(target=run_real_test, args=(args, global_start, real_queue))
+def plot_cli():
+    """Entry point for ktune-plot: render a saved .npz run."""
+    parser = argparse.ArgumentParser(description="ktune-plot - render plots from a saved ktune .npz file.")
+    parser.add_argument("npz", help="Path to a .npz file written by ktune")
+    parser.add_argument("--no-show", action="store_true", help="Only save the PNG, do not open a window")
+    args = parser.parse_args()
 
-    sim_proc.start()
-    real_proc.start()
+    sim_data, real_data, header, title_str = load_npz(args.npz)
+    png_path = os.path.splitext(args.npz)[0] + ".png"
+    plot_results(sim_data, real_data, title_str, header["test_type"], png_path, show=not args.no_show)
 
-    print("Waiting for data from simulator and real robot...")
 
-    sim_data = sim_queue.get()
-    real_data = real_queue.get()
+#############################
+# RESULTS #
+#############################
+def json_list(values):
+    """Convert a channel to a JSON-safe list: NaN (never-reported fields) becomes null."""
+    values = np.asarray(values)
+    return np.where(np.isnan(values), None, values).tolist()
 
-    sim_proc.join(timeout=5)
-    real_proc.join(timeout=5)
 
-    print("Plotting data...")
-        # Plotting both simulator and real data on the same plots.
+def save_results(args, sim_data, real_data, now_str):
+    """Write raw JSON and .npz data for both runs, compute step metrics, and plot if requested."""
     if not args.no_log:
         JOINT_NAMES = {
             11: "Left Shoulder Roll",
@@ -790,21 +839,22 @@ async def main():
             })
             title_str = (f"{args.name} -- Sine Wave Test -- ID: {args.actuator_id} {test_joint}\n"
                         f"Center: {args.start_pos}°, Freq: {args.freq} Hz, Amp: {args.amp}°, "
-                        f"Sample/Ctrl Rate: {args.sample_rate} Hz\n"
+                        f"Ctrl Rate: 50 Hz, Sample Rate: {args.sample_rate} Hz\n"
                         f"Sim Kp: {args.sim_kp} Kv: {args.sim_kv} | Real Kp: {args.kp} Kd: {args.kd} Ki: {args.ki}\n"
                         f"Acceleration: {args.acceleration:.0f} deg/s²")
         elif args.test == "step":
             # Construct the step sequence as used in the test:
-            # Initial hold at 0°, then for each cycle: step up to step_size then step down to 0°
+            # Initial hold at start_pos, then for each cycle: step up by step_size then back down to start_pos
             vel = args.vel_limit if hasattr(args, "vel_limit") else 200.0
-            steps_list = [(0.0, vel, args.step_hold_time)]
-            for _ in range(args.step_count):
-                steps_list.append((args.step_size, vel, args.step_hold_time))
-                steps_list.append((0.0, vel, args.step_hold_time))
-            
+            hold = args.step_hold_time
+            base, top = args.start_pos, args.start_pos + args.step_size
+            steps_list = [(base, vel, hold)] + [(top, vel, hold), (base, vel, hold)] * args.step_count
+
             # Compute overshoots using the collected time and position data.
-            overshoots_sim = compute_step_overshoots(np.array(sim_data["time"]), np.array(sim_data["position"]), steps_list, window_duration=1.0)
-            overshoots_real = compute_step_overshoots(np.array(real_data["time"]), np.array(real_data["position"]), steps_list, window_duration=1.0)
+            overshoots_sim = compute_step_overshoots(sim_data["time"], sim_data["position"], steps_list, window_duration=1.0,
+                                                     command_times=sim_data["cmd_time"])
+            overshoots_real = compute_step_overshoots(real_data["time"], real_data["position"], steps_list, window_duration=1.0,
+                                                      command_times=real_data["cmd_time"])
             max_overshoot_sim = max(overshoots_sim) if len(overshoots_sim) > 0 else 0.0
             max_overshoot_real = max(overshoots_real) if len(overshoots_real) > 0 else 0.0
 
@@ -832,11 +882,11 @@ async def main():
         # Save raw data to JSON files.
         sim_output = {
             "header": header,
-            "data": sim_data
+            "data": {k: json_list(v) for k, v in sim_data.items()}
         }
         real_output = {
             "header": header,
-            "data": real_data
+            "data": {k: json_list(v) for k, v in real_data.items()}
         }
         json_base_path = os.path.join(data_dir, f"{now_str}_{args.test}")
         with open(f"{json_base_path}_sim.json", "w") as f:
@@ -846,55 +896,173 @@ async def main():
         print(f"Saved raw data to {json_base_path}_sim.json and {json_base_path}_real.json")
 
 
-        # Plotting both simulator and real data on the same plots.
-        fig, axs = plt.subplots(2, 2, figsize=(14, 8), sharex=True)
-        fig.suptitle(title_str, fontsize=16)
-        axs[0, 0].plot(sim_data["cmd_time"], sim_data["cmd_pos"], '--', color='black', linewidth=1, label='Sim Command Pos')
-        axs[0, 0].plot(sim_data["time"], sim_data["position"], 'o-', color='blue', markersize=2, label='Sim Actual Pos')
-        axs[0, 0].set_title("Sim - Position")
-        axs[0, 0].set_ylabel("Position (deg)")
-        axs[0, 0].legend()
-        axs[0, 0].grid(True)
-
-        if args.test == "sine":
-            axs[1, 0].plot(sim_data["cmd_time"], sim_data["cmd_vel"], '--', color='black', linewidth=1, label='Sim Command Vel')
-        axs[1, 0].plot(sim_data["time"], sim_data["velocity"], 'o-', color='blue', markersize=2, label='Sim Actual Vel')
-        axs[1, 0].set_title("Sim - Velocity")
-        axs[1, 0].set_xlabel("Time (s)")
-        axs[1, 0].set_ylabel("Velocity (deg/s)")
-        axs[1, 0].legend()
-        axs[1, 0].grid(True)
-
-        # Real Robot subplots (right column)
-        axs[0, 1].plot(real_data["cmd_time"], real_data["cmd_pos"], '--', color='black', linewidth=1, label='Real Command Pos')
-        axs[0, 1].plot(real_data["time"], real_data["position"], 's-', color='red', markersize=2, linewidth=1, label='Real Actual Pos')
-        axs[0, 1].set_title("Real - Position")
-        axs[0, 1].set_ylabel("Position (deg)")
-        axs[0, 1].legend()
-        axs[0, 1].grid(True)
-
-        if args.test == "sine":
-            axs[1, 1].plot(real_data["cmd_time"], real_data["cmd_vel"], '--', color='black', linewidth=1, label='Real Command Vel')
-        axs[1, 1].plot(real_data["time"], real_data["velocity"], 's-', color='red', markersize=2, linewidth=1,label='Real Actual Vel')
-        axs[1, 1].set_title("Real - Velocity")
-        axs[1, 1].set_xlabel("Time (s)")
-        axs[1, 1].set_ylabel("Velocity (deg/s)")
-        axs[1, 1].legend()
-        axs[1, 1].grid(True)
-
-        plt.figtext(0.5, 0.02, f"ktune v{__version__}", ha='center', va='center', fontsize=12)
-        plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-        png_path = os.path.join(plot_dir, f"{now_str}_{args.test}.png")
-        plt.savefig(png_path)
-        print(f"Saving plot data to {plot_dir}/{args.test}_test_{now_str}.png")
-        plt.show()
-        plt.close()
+        # Save a compact float32 copy that ktune-plot can render later.
+        npz_path = os.path.join(plot_dir, f"{now_str}_{args.test}.npz")
+        save_npz(npz_path, sim_data, real_data, header, title_str)
+        print(f"Saved plot data to {npz_path}")
+
+        if args.plot:
+            print("Plotting data...")
+            plot_results(sim_data, real_data, title_str, args.test,
+                         os.path.join(plot_dir, f"{now_str}_{args.test}.png"))
+
+
+#############################
+# MAIN (CLI + Orchestration)#
+#############################
+async def main():
+    parser = argparse.ArgumentParser(
+        description="ktune - CLI tool for actuator tests (sine or step) on both simulator and real robot."
+    )
+    parser.add_argument("--name", default="Zeroth01", help="Name For Plot titles")
+    parser.add_argument("--sim_ip", default="127.0.0.1", help="Simulator KOS IP address (default=localhost)")
+    parser.add_argument("--ip", default="192.168.42.1", help="Real robot KOS IP address (default=192.168.42.1)")
+    parser.add_argument("--actuator-id", type=int, default=11, help="Actuator ID to test.")
+    parser.add_argument("--test", choices=["step", "sine", "chirp"], help="Type of test to run.")
+    parser.add_argument("--start-pos", type=float, default=0.0, help="Start position for tests (degrees)")
+    # Chirp test parameters
+    parser.add_argument("--chirp-amp", type=float, default=5.0, help="Chirp amplitude (degrees)")
+    parser.add_argument("--chirp-init-freq", type=float, default=1.0, help="Chirp initial frequency (Hz)")
+    parser.add_argument("--chirp-sweep-rate", type=float, default=0.5, help="Chirp sweep rate (Hz per second)")
+    parser.add_argument("--chirp-duration", type=float, default=5.0, help="Chirp test duration (seconds)")
+
+    # Sine test parameters
+    parser.add_argument("--freq", type=float, default=1.0, help="Sine frequency (Hz)")
+    parser.add_argument("--amp", type=float, default=5.0, help="Sine amplitude (degrees)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Sine test duration (seconds)")
+
+    # Step test parameters
+    parser.add_argument("--step-size", type=float, default=10.0, help="Step size (degrees)")
+    parser.add_argument("--step-hold-time", type=float, default=3.0, help="Time to hold at step (seconds)")
+    parser.add_argument("--step-count", type=int, default=2, help="Number of steps to take")
 
+    # Simulation gains
+    parser.add_argument("--sim-kp", type=float, default=24.0, help="Proportional gain")
+    parser.add_argument("--sim-kv", type=float, default=0.75, help="Damping gain")
+
+    # Actuator config
+    parser.add_argument("--kp", type=float, default=20.0, help="Proportional gain")
+    parser.add_argument("--kd", type=float, default=55.0, help="Derivative gain")
+    parser.add_argument("--ki", type=float, default=0.01, help="Integral gain")
+    parser.add_argument("--acceleration", type=float, default=0.0, help="Acceleration (deg/s^2)")
+    parser.add_argument("--max-torque", type=float, default=100.0, help="Max torque")
+    parser.add_argument("--torque-off", action="store_true", help="Disable torque for test?")
+
+    # Data logging
+    parser.add_argument("--no-log", action="store_true", help="Do not record/plot data")
+    parser.add_argument("--plot", action="store_true", help="Plot results after the test (otherwise use ktune-plot)")
+    parser.add_argument("--log-duration-pad", type=float, default=2.0,
+                        help="Pad (seconds) after motion ends to keep logging")
+    parser.add_argument("--sample-rate", type=float, default=100.0, help="Data collection rate (Hz)")
+    parser.add_argument("--isolate", action="store_true",
+                        help="Run simulator and real tests in separate processes")
+    parser.add_argument("--timer-spin-ms", type=float, default=0.0,
+                        help="Busy-wait this long (ms) before each sine/chirp command tick for tighter timing; costs CPU")
+
+    # Servo Enable/Disable
+    parser.add_argument("--enable-servos", type=str, help="Comma delimited list of servo IDs to enable (e.g., 11,12,13)")
+    parser.add_argument("--disable-servos", type=str, help="Comma delimited list of servo IDs to disable (e.g., 31,32,33)")
+    parser.add_argument('--version', action='version', version=f'ktune v{__version__}')
+    args = parser.parse_args()
+
+    now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # Handle servo enable/disable separately from test execution
+    if args.enable_servos is not None or args.disable_servos is not None:
+        try:
+            await configure_additional_servos(get_kos(args.ip), args)
+            await configure_additional_servos(get_kos(args.sim_ip), args)
+        finally:
+            await close_kos_clients()
+        print("Servos configured")
+        return
+    elif not args.test:
+        parser.print_help()
+        exit(1)
+
+    print(f"Connecting to Simulator at {args.sim_ip} and Real robot at {args.ip}...")
+
+    try:
+        print("Testing KOS-SIM connection performance...")
+        sim_kos = get_kos(args.sim_ip)
+        sim_start = time.monotonic()
+        for _ in range(100):  # Test 100 samples
+            await sim_kos.actuator.get_actuators_state([args.actuator_id])
+        sim_end = time.monotonic()
+        sim_rate = 100 / (sim_end - sim_start)
+
+        print("Testing KOS-REAL connection performance...")
+        real_kos = get_kos(args.ip)
+        real_start = time.monotonic() 
+        for _ in range(100):  # Test 100 samples
+            await real_kos.actuator.get_actuators_state([args.actuator_id])
+        real_end = time.monotonic()
+        real_rate = 100 / (real_end - real_start)
+
+        await asyncio.sleep(1.0)
+        print(f"Max KOS-SIM sampling rate: {sim_rate:.1f} Hz")
+        print(f"Max KOS-REAL sampling rate: {real_rate:.1f} Hz")
+        print(f"Required sampling rate: {args.sample_rate} Hz")
+
+        if sim_rate < args.sample_rate or real_rate < args.sample_rate:
+            print(f"\nERROR: Requested sampling rate ({args.sample_rate} Hz) exceeds maximum achievable rates")
+            print("Try re-running kos-sim --no-render or reduce the sampling rate and try again")
+            exit(1)
+
+        global_start = time.monotonic()
+        if not args.isolate:
+            print("Waiting for data from simulator and real robot...")
+
+            # Both tests are I/O-bound on gRPC, so one event loop drives them concurrently
+            # over the channels already warmed up by the connection probe.
+            sim_trace, real_trace = await asyncio.gather(
+                run_test(args, sim_kos, global_start, is_real=False),
+                run_test(args, real_kos, global_start, is_real=True),
+            )
+    finally:
+        # Also runs before --isolate forks: worker processes open their own channels.
+        await close_kos_clients()
+
+    if args.isolate:
+        sim_queue = Queue()
+        real_queue = Queue()
+        # A fresh directory per run, so concurrent --isolate runs never share trace files.
+        trace_dir = tempfile.mkdtemp(prefix="ktune_")
+        sim_trace_path = os.path.join(trace_dir, "sim")
+        real_trace_path = os.path.join(trace_dir, "real")
+
+        sim_proc = Process(target=run_sim_test, args=(args, global_start, sim_queue, sim_trace_path))
+        real_proc = Process(target=run_real_test, args=(args, global_start, real_queue, real_trace_path))
+
+        try:
+            sim_proc.start()
+            real_proc.start()
+
+            print("Waiting for data from simulator and real robot...")
+
+            sim_data = Trace.load(**sim_queue.get())
+            real_data = Trace.load(**real_queue.get())
+
+            sim_proc.join(timeout=5)
+            real_proc.join(timeout=5)
+
+            save_results(args, sim_data, real_data, now_str)
+        finally:
+            for proc in (sim_proc, real_proc):
+                if proc.is_alive():
+                    proc.terminate()
+            # Release our read-only maps first: mapped files cannot be deleted on Windows.
+            sim_data = real_data = None
+            shutil.rmtree(trace_dir, ignore_errors=True)
+    else:
+        save_results(args, sim_trace.as_dict(), real_trace.as_dict(), now_str)
 
     print("Test complete.")
 
 def cli():
     """Entry point for the command line interface"""
+    # Stays on the stock asyncio loop: KOS.connect() calls nest_asyncio.apply(),
+    # which raises ValueError on uvloop's loop, so uvloop cannot be installed here.
     asyncio.run(main())
 
 if __name__ == "__main__":
@@ -66,6 +66,7 @@ setup(
     entry_points={
         "console_scripts": [
             "ktune=ktune.ktune:cli",
+            "ktune-plot=ktune.ktune:plot_cli",
         ],
     },
 )
@@ -0,0 +1,24 @@
+"""Tests for the _clock scheduling helper."""
+
+import asyncio
+import time
+
+from ktune import _clock
+
+
+def test_sleep_until_spin_never_wakes_early():
+    async def run():
+        deadline = time.monotonic() + 0.01
+        await _clock.sleep_until(deadline, spin=0.002)
+        return time.monotonic() - deadline
+
+    assert asyncio.run(run()) >= 0.0
+
+
+def test_sleep_until_past_deadline_returns_immediately():
+    async def run():
+        start = time.monotonic()
+        await _clock.sleep_until(start - 1.0, spin=0.002)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) < 0.01
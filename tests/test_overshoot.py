@@ -0,0 +1,75 @@
+"""Tests for step-response overshoot metrics."""
+
+import numpy as np
+import pytest
+
+from ktune.ktune import compute_step_overshoots
+
+# Hold base, step up by 10°, step back down: two transitions, 1 s apart.
+HOLD = 1.0
+
+
+def make_steps(base):
+    return [(base, 200.0, HOLD), (base + 10.0, 200.0, HOLD), (base, 200.0, HOLD)]
+
+
+def make_response(base, up_time, down_time, rate=100.0, end=4.0):
+    """Ideal step response to commands at up_time/down_time, with a 12° peak and a -1° trough."""
+    t = np.arange(0.0, end, 1.0 / rate)
+    pos = np.full_like(t, base)
+    pos[t >= up_time] = base + 10.0
+    pos[(t >= up_time + 0.2) & (t < up_time + 0.3)] = base + 12.0
+    pos[t >= down_time] = base
+    pos[(t >= down_time + 0.2) & (t < down_time + 0.3)] = base - 1.0
+    return t, pos
+
+
+def baseline_overshoots(time_array, pos_array, steps, window_duration=1.0):
+    """The original masked-scan implementation, with command times rebuilt from the hold durations."""
+    step_times = np.concatenate([[0.0], np.cumsum([s[2] for s in steps])])
+    overshoots = []
+    for i in range(1, len(steps)):
+        old_target, new_target = steps[i - 1][0], steps[i][0]
+        idx = np.where((time_array >= step_times[i]) & (time_array <= step_times[i] + window_duration))[0]
+        if len(idx) == 0:
+            continue
+        if new_target > old_target:
+            overshoot = (np.nanmax(pos_array[idx]) - new_target) / (new_target - old_target) * 100.0
+        else:
+            overshoot = (new_target - np.nanmin(pos_array[idx])) / (old_target - new_target) * 100.0
+        overshoots.append(max(0.0, overshoot))
+    return overshoots
+
+
+def test_matches_baseline_without_command_times():
+    t, pos = make_response(0.0, up_time=1.0, down_time=2.0)
+    steps = make_steps(0.0)
+
+    result = compute_step_overshoots(t, pos, steps)
+    assert result == pytest.approx(baseline_overshoots(t, pos, steps))
+    assert result == pytest.approx([20.0, 10.0])
+
+
+def test_non_zero_start_position():
+    t, pos = make_response(30.0, up_time=1.0, down_time=2.0)
+
+    assert compute_step_overshoots(t, pos, make_steps(30.0)) == pytest.approx([20.0, 10.0])
+
+
+def test_command_times_shift_the_windows():
+    # Commands actually went out 0.5 s late; a disturbance at 1.1 s precedes the step up.
+    t, pos = make_response(0.0, up_time=1.5, down_time=2.5)
+    pos[(t >= 1.1) & (t < 1.15)] = 15.0
+    steps = make_steps(0.0)
+
+    assert compute_step_overshoots(t, pos, steps, command_times=[0.5, 1.5, 2.5]) == pytest.approx([20.0, 10.0])
+    # The nominal schedule would open the first window at 1.0 s and catch the disturbance.
+    assert compute_step_overshoots(t, pos, steps)[0] == pytest.approx(50.0)
+
+
+def test_short_command_times_fall_back_to_nominal_schedule():
+    t, pos = make_response(0.0, up_time=1.0, down_time=2.0)
+    steps = make_steps(0.0)
+
+    assert compute_step_overshoots(t, pos, steps, command_times=[0.0]) == \
+        pytest.approx(compute_step_overshoots(t, pos, steps))
@@ -0,0 +1,23 @@
+"""Tests for the plotting helpers."""
+
+import numpy as np
+
+from ktune.ktune import hold_commands
+
+CMD_TIME = np.array([1.0, 2.0, 3.0])
+CMD_POS = np.array([10.0, 20.0, 30.0], dtype=np.float32)
+
+
+def test_samples_before_first_command_use_first_command():
+    # No command has been sent yet; the index is clamped to the first event.
+    assert hold_commands(np.array([0.0, 0.5]), CMD_TIME, CMD_POS).tolist() == [10.0, 10.0]
+
+
+def test_sample_at_command_time_uses_that_command():
+    # side='right': a command counts as held from its own time stamp onwards.
+    assert hold_commands(np.array([1.0, 2.0, 3.0]), CMD_TIME, CMD_POS).tolist() == [10.0, 20.0, 30.0]
+
+
+def test_samples_between_and_after_commands_hold_last_value():
+    t = np.array([1.5, 2.999, 3.5, 100.0])
+    assert hold_commands(t, CMD_TIME, CMD_POS).tolist() == [10.0, 20.0, 30.0, 30.0]
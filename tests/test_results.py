@@ -0,0 +1,21 @@
+"""Tests for the JSON results output."""
+
+import json
+
+import numpy as np
+
+from ktune.ktune import json_list
+
+
+def test_json_list_writes_nan_as_null():
+    values = np.array([1.5, np.nan, -2.0], dtype=np.float32)
+    out = json_list(values)
+    assert out == [1.5, None, -2.0]
+    assert json.loads(json.dumps(out, allow_nan=False)) == [1.5, None, -2.0]
+
+
+def test_json_list_keeps_plain_floats():
+    values = np.array([0.1, 0.2], dtype=np.float64)
+    out = json_list(values)
+    assert out == [0.1, 0.2]
+    assert all(type(v) is float for v in out)
@@ -0,0 +1,70 @@
+"""Tests for the Trace sample buffer."""
+
+import numpy as np
+from kos_protos import actuator_pb2
+
+from ktune.ktune import Trace
+
+
+def make_response(**fields):
+    return actuator_pb2.GetActuatorsStateResponse(
+        states=[actuator_pb2.ActuatorStateResponse(actuator_id=11, **fields)]
+    )
+
+
+def test_push_logs_all_measured_channels():
+    trace = Trace(1)
+    trace.push(0.5, make_response(position=1.0, velocity=2.0, torque=3.0, voltage=4.0, current=5.0))
+
+    data = trace.as_dict()
+    assert data["time"].tolist() == [0.5]
+    for name, value in (("position", 1.0), ("velocity", 2.0), ("torque", 3.0), ("voltage", 4.0), ("current", 5.0)):
+        assert data[name].tolist() == [value]
+
+
+def test_push_leaves_unset_fields_nan():
+    trace = Trace(2)
+    trace.push(0.1, make_response(position=1.0))
+    trace.push(0.2, actuator_pb2.GetActuatorsStateResponse())
+
+    data = trace.as_dict()
+    assert data["position"][0] == 1.0
+    assert np.isnan(data["position"][1])
+    for name in ("velocity", "torque", "voltage", "current"):
+        assert np.isnan(data[name]).all()
+
+
+def assert_same_channels(loaded, expected):
+    assert loaded.keys() == expected.keys()
+    for name, values in expected.items():
+        assert loaded[name].dtype == values.dtype, name
+        np.testing.assert_array_equal(loaded[name], values, err_msg=name)
+
+
+def test_memmap_trace_round_trips_through_load(tmp_path):
+    prefix = str(tmp_path / "real")
+    trace = Trace(4, n_cmd=3, path_prefix=prefix)
+    trace.push(0.1, make_response(position=1.0, velocity=2.0, torque=3.0, voltage=4.0, current=5.0))
+    trace.push(0.2, make_response(position=1.5))
+    trace.push_command(0.05, 10.0, 0.0)
+    trace.push_command(0.15, 20.0, 1.0)
+    trace.flush()
+
+    # Only the filled part is loaded back: i samples and j commands, not the full buffers.
+    loaded = Trace.load(prefix, n=trace.i, n_cmd=trace.j)
+    assert len(loaded["time"]) == 2
+    assert len(loaded["cmd_time"]) == 2
+    assert_same_channels(loaded, trace.as_dict())
+
+
+def test_memmap_trace_without_commands_loads_empty(tmp_path):
+    prefix = str(tmp_path / "sim")
+    # n_cmd=0 still maps a one-slot file, which load must slice back to nothing.
+    trace = Trace(1, n_cmd=0, path_prefix=prefix)
+    trace.push(0.1, make_response(position=1.0))
+    trace.flush()
+
+    loaded = Trace.load(prefix, n=trace.i, n_cmd=trace.j)
+    for name in ("cmd_time", "cmd_pos", "cmd_vel"):
+        assert len(loaded[name]) == 0
+    assert_same_channels(loaded, trace.as_dict())